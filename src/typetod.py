@@ -9,14 +9,27 @@ import getopt
 import os.path
 import time
 import collections
+import itertools
 import signal
 import threading
+import queue
 import getpass
 import enum
 import urllib.request
 import urllib.parse
 import http.client
 import ftplib
+import html.parser
+import xml.etree.ElementTree
+import asyncio
+import json
+import random
+import io
+import gzip
+import bz2
+import lzma
+import zlib
+import zipfile
 
 
 # global parameters
@@ -37,6 +50,40 @@ UNIT_WPM = 0
 UNIT_CPS = 1
 SPEED_UNIT = UNIT_WPM
 
+## renderer
+RENDERER_CURSES = 0
+RENDERER_ANSI = 1
+RENDERER = RENDERER_CURSES
+
+## race mode
+PROGRESS_INTERVAL = 0.1 # [s] between progress reports of clients
+BROADCAST_INTERVAL = 0.1 # [s] between leaderboard broadcasts of servers
+RACE_TIMEOUT = 5 # [s] to wait for a sample from a server
+RACE_BUFFER_LIMIT = 2 ** 16 # [byte] skip broadcasts to clients slower than it
+RACE_BACKLOG = 1024 # connections waiting to be accepted
+LEADERBOARD_SIZE = 3
+BOT_SPEED = 200 # [wpm]
+BOT_ERROR_RATE = 0.02
+
+## remote files
+REMOTE_TIMEOUT = 5 # [s] for connections and probes
+ARCHIVE_TIMEOUT = 60 # [s] to download a remote zip archive
+
+## compressed files
+MAGIC_NUMBERS = (
+  (b'\x1f\x8b', lambda fo: gzip.GzipFile(fileobj=fo)),
+  (b'BZh', bz2.BZ2File),
+  (b'\xfd7zXZ\x00', lzma.LZMAFile),
+)
+ZIP_MAGIC_NUMBER = b'PK\x03\x04'
+DECOMPRESSION_ERRORS = (EOFError, OSError, zlib.error, lzma.LZMAError,
+    zipfile.BadZipFile, RuntimeError) # RuntimeError for encrypted members
+
+## rss feeds mode
+FEED_CHUNK_SIZE = 2 ** 14 # [byte] fed to the xml parser at once
+FEED_TIMEOUT = 10 # [s]
+MENU_POLLING_INTERVAL = 100 # [ms] while feeds are loading
+
 ## translation table
 TRANS_TABLE = {
   ord(u'\xa0'): ' ',
@@ -121,13 +168,27 @@ class Game:
   def __init__(self, window):
     self.window = window
     self.sample_t = collections.deque([])
+    # (line id, line, offset) of each line in sample_t
+    self.sample_o = collections.deque([])
+    # lines in samples not wrapped yet and the offset in the first one
+    self.source = collections.deque([])
+    self.source_offset = 0
+    self.line_id = 0
     self.input_t = ""
-    self.width = self.window.getmaxyx()[1]
     # evaluation variables
     self.start_time = 0
     self.type_num = 0
     self.error_num = 0
-    # generate the line layout
+    self.line_num = 0
+    self.__layout()
+    for i in range(self.curr_sample_line + 1):
+      self.sample_t.append("")
+      self.sample_o.append((-1, "", 0))
+    self.first_sample = True
+
+  def __layout(self):
+    """generate the line layout"""
+    self.width = self.window.getmaxyx()[1]
     self.input_line = self.window.getmaxyx()[0] // 2
     self.sample_lines = []
     self.sep_lines = []
@@ -144,9 +205,6 @@ class Game:
         self.sep_lines.append(y)
       elif y >= self.input_line + 2:
         self.sample_lines.append(y)
-    for i in range(self.curr_sample_line + 1):
-      self.sample_t.append("")
-    self.first_sample = True
 
   def start(self):
     self.__new_line()
@@ -156,13 +214,13 @@ class Game:
     self.speed = self.get_speed()
 
   def is_over(self):
-    if len(self.sample_t) <= self.curr_sample_line:
+    if len(self.sample_t) <= self.curr_sample_line and not self.source:
       return True
     else:
       return False
 
   def is_almost_over(self):
-    if len(self.sample_t) < len(self.sample_lines) + 4:
+    if len(self.sample_t) + len(self.source) < len(self.sample_lines) + 4:
       return True
     else:
       return False
@@ -170,15 +228,21 @@ class Game:
   def add_sample(self, text):
     if self.SEPARATE_SAMPLES and self.KEEP_EMPTY_LINES \
         and not self.first_sample:
-      self.sample_t += [""]
+      self.__add_lines([""])
     elif self.first_sample:
       self.first_sample = False
-    self.sample_t += self.__format(uni_to_ascii(text))
+    self.__add_lines(self.__split(uni_to_ascii(text)))
+
+  def __add_lines(self, lines):
+    for line in lines:
+      self.source.append((self.line_id, line))
+      self.line_id += 1
 
   def add_char(self, char):
     self.type_num += 1
     if (char == ' ' or char == '\n') \
         and self.input_t == self.sample_t[self.curr_sample_line]:
+      self.line_num += 1
       self.__new_line()
     elif char == '\n' or len(self.input_t) == self.width \
         or len(self.input_t) == len(self.sample_t[self.curr_sample_line]):
@@ -273,49 +337,115 @@ class Game:
   def typed(self):
     return self.type_num > 0
 
+  def get_progress(self):
+    return self.line_num, self.type_num, self.error_num
+
+  def resize(self):
+    """rebuild the layout for the new size of the window re-wrapping only
+    lines on it"""
+    if self.is_over():
+      self.__layout()
+      return
+    seq, line, offset = self.sample_o[self.curr_sample_line]
+    # give lines wrapped ahead back to the source
+    lines = [(seq, line)]
+    for next_seq, next_line, next_offset \
+        in itertools.islice(self.sample_o, self.curr_sample_line + 1, None):
+      if next_seq != lines[-1][0]:
+        lines.append((next_seq, next_line))
+    if self.source and self.source[0][0] == lines[-1][0]:
+      self.source.popleft()
+    self.source.extendleft(reversed(lines))
+    self.source_offset = offset
+    # re-wrap typed lines on the window
+    history = []
+    for prev_seq, prev_line, prev_offset \
+        in itertools.islice(self.sample_o, self.curr_sample_line):
+      if prev_seq >= 0 and (not history or history[-1][0] != prev_seq):
+        history.append((prev_seq, prev_line, prev_offset))
+    self.__layout()
+    self.sample_t.clear()
+    self.sample_o.clear()
+    for prev_seq, prev_line, prev_offset in history:
+      end = len(prev_line)
+      if prev_seq == seq:
+        end = offset - 1 if prev_line[offset - 1] == ' ' else offset
+      while True:
+        text, next_offset = self.__wrap(prev_line, prev_offset, end)
+        self.sample_t.append(text)
+        self.sample_o.append((prev_seq, prev_line, prev_offset))
+        prev_offset = next_offset
+        if prev_offset >= end:
+          break
+    while len(self.sample_t) > self.curr_sample_line:
+      self.sample_t.popleft()
+      self.sample_o.popleft()
+    while len(self.sample_t) < self.curr_sample_line:
+      self.sample_t.appendleft("")
+      self.sample_o.appendleft((-1, "", 0))
+    self.__wrap_source(len(self.sample_lines) + 1)
+    # redraw the window keeping the input
+    input_t = self.input_t[:len(self.sample_t[self.curr_sample_line])]
+    self.__draw()
+    self.input_t = ''
+    for char in input_t:
+      self.__add_char(char)
+    if self.MORPHING:
+      self.__morph()
+
   def __new_line(self):
     self.input_t = ""
+    self.__wrap_source(len(self.sample_lines) + 1)
     self.sample_t.popleft()
+    self.sample_o.popleft()
+    self.__draw()
+
+  def __draw(self):
     self.window.erase()
     # display sample texts
-    if len(self.sample_t) < len(self.sample_lines):
-      for i, text in enumerate(self.sample_t):
-        self.window.addstr(self.sample_lines[i], 0, text)
-    else:
-      for i, y in enumerate(self.sample_lines):
-        self.window.addstr(y, 0, self.sample_t[i])
+    for y, text in zip(self.sample_lines, self.sample_t):
+      self.window.addstr(y, 0, text)
     # display separation lines
     for y in self.sep_lines:
       self.window.addstr(y, 0, self.SEP_LINE_CHAR * self.width)
     self.window.move(self.input_line, 0)
 
-  def __format(self, text):
-    t = []
+  def __split(self, text):
     text = re.sub(r'^\n+', '', re.sub(r' +\n', r'\n',
         re.sub(r'[ \n]+$', '', conv_tabs(text))))
     if not self.KEEP_EMPTY_LINES:
       text = re.sub(r'\n+', r'\n', text)
     if self.ERASE_MULTIPLE_SPACE:
       text = re.sub(r'\n +', r'\n', re.sub(' +', ' ', text))
-    while len(text) > 0:
-      index = text.find('\n', 0, self.width)
-      if index >= 0:
-        t.append(text[:index])
-        text = text[index + 1:]
-      # leave one space at the end of the line on terminals
-      # when it ends normally without too long a word.
-      elif len(text) < self.width:
-        t.append(text)
-        break
+    if len(text) == 0:
+      return [''] if self.KEEP_EMPTY_LINES else []
+    return text.split('\n')
+
+  def __wrap_source(self, size):
+    """wrap lines in the source until sample_t has the size"""
+    while len(self.sample_t) < size and self.source:
+      seq, line = self.source[0]
+      text, offset = self.__wrap(line, self.source_offset, len(line))
+      self.sample_t.append(text)
+      self.sample_o.append((seq, line, self.source_offset))
+      if offset >= len(line):
+        self.source.popleft()
+        self.source_offset = 0
       else:
-        index = text.rfind(' ', 0, self.width)
-        if index >= 0:
-          t.append(text[:index])
-          text = text[index + 1:]
-        else:
-          t.append(text[:self.width])
-          text = text[self.width:]
-    return t if not (t == [] and self.KEEP_EMPTY_LINES) else ['']
+        self.source_offset = offset
+
+  def __wrap(self, line, offset, end):
+    """return the part of the line from the offset fitting in the width and
+    the offset of the next one"""
+    # leave one space at the end of the line on terminals
+    # when it ends normally without too long a word.
+    if end - offset < self.width:
+      return line[offset:end], end
+    index = line.rfind(' ', offset, offset + self.width)
+    if index >= 0:
+      return line[offset:index], index + 1
+    else:
+      return line[offset:offset + self.width], offset + self.width
 
 class Boss(threading.Thread):
   def __init__(self, game):
@@ -332,6 +462,405 @@ class Boss(threading.Thread):
     while self.game.is_almost_over() and items.is_left():
       self.game.add_sample(items.popleft().get_content())
 
+class NullWindow:
+  """A window which draws nothing for games without terminals"""
+  def __init__(self, height=24, width=80):
+    self.height = height
+    self.width = width
+    self.y = 0
+    self.x = 0
+
+  def getmaxyx(self):
+    return self.height, self.width
+
+  def getyx(self):
+    return self.y, self.x
+
+  def move(self, y, x):
+    self.y, self.x = y, x
+
+  def addstr(self, *args):
+    if len(args) >= 3:
+      self.y, self.x = args[0], args[1]
+      self.x += len(args[2])
+    else:
+      self.x += len(args[0])
+
+  def addch(self, *args):
+    self.x += 1
+
+  def clrtoeol(self):
+    pass
+
+  def erase(self):
+    self.y, self.x = 0, 0
+
+class AnsiScreen:
+  """Compose frames in memory and write their differences from the last ones
+  to a terminal at once
+  """
+  SYNC_UPDATE = False # not every terminal ignores its escape sequences
+  SGR = ((curses.A_BOLD, 1), (curses.A_UNDERLINE, 4), (curses.A_BLINK, 5),
+      (curses.A_REVERSE, 7))
+  BLANK = (' ', curses.A_NORMAL)
+
+  def __init__(self, fd, height, width):
+    self.fd = fd
+    self.height = height
+    self.width = width
+    self.rows = [[self.BLANK] * width for y in range(height)]
+    self.cursor = (0, 0)
+    self.clear()
+
+  def clear(self):
+    """forget what the terminal shows to redraw everything"""
+    self.shown = None
+
+  def resize(self, height, width):
+    self.height = height
+    self.width = width
+    self.rows = [[self.BLANK] * width for y in range(height)]
+    self.clear()
+
+  def derwin(self, height, width, begin_y, begin_x):
+    return AnsiWindow(self, height, width, begin_y, begin_x)
+
+  def flush(self):
+    # the timer of the status bar flushes too, and a flush interrupted by it
+    # would write bytes computed against a stale cursor and attribute
+    mask = signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGALRM])
+    try:
+      return self.__flush()
+    finally:
+      signal.pthread_sigmask(signal.SIG_SETMASK, mask)
+
+  def __flush(self):
+    out = []
+    if self.shown is None:
+      out.append('\x1b[0m\x1b[H\x1b[2J')
+      self.shown = [[self.BLANK] * self.width for y in range(self.height)]
+      self.pos = (0, 0)
+      self.attr = curses.A_NORMAL
+    changed_rows = self.__scroll(out)
+    for y, (row, shown) in enumerate(zip(self.rows, self.shown)):
+      if row == shown:
+        continue
+      changed_rows += 1
+      first = 0
+      while row[first] == shown[first]:
+        first += 1
+      last = self.width
+      while row[last - 1] == shown[last - 1]:
+        last -= 1
+      end = self.width
+      while end > first and row[end - 1] == self.BLANK:
+        end -= 1
+      self.__move(out, y, first)
+      for x in range(first, min(last, end)):
+        char, attr = row[x]
+        if attr != self.attr:
+          self.__set_attr(out, attr)
+        out.append(char)
+      self.pos = (y, min(last, end)) if min(last, end) < self.width else None
+      if last > end:
+        if self.attr != curses.A_NORMAL:
+          self.__set_attr(out, curses.A_NORMAL)
+        out.append('\x1b[K')
+      self.shown[y] = row[:]
+    if self.attr != curses.A_NORMAL:
+      self.__set_attr(out, curses.A_NORMAL)
+    self.__move(out, *self.cursor)
+    if not out:
+      return 0
+    if changed_rows > 1 and self.SYNC_UPDATE:
+      out.insert(0, '\x1b[?2026h')
+      out.append('\x1b[?2026l')
+    data = ''.join(out).encode()
+    size = len(data)
+    while data:
+      data = data[os.write(self.fd, data):]
+    return size
+
+  def __scroll(self, out):
+    """scroll runs of rows moved up by one line with scrolling regions"""
+    scrolled_rows = 0
+    y = 0
+    while y < self.height - 1:
+      top = y
+      while y < self.height - 1 and self.rows[y] == self.shown[y + 1] \
+          and self.rows[y] != self.shown[y]:
+        y += 1
+      if y - top >= 2:
+        if self.attr != curses.A_NORMAL:
+          self.__set_attr(out, curses.A_NORMAL)
+        out.append('\x1b[{};{}r\x1b[S\x1b[r'.format(top + 1, y + 1))
+        self.pos = (0, 0)
+        self.shown[top:y] = self.shown[top + 1:y + 1]
+        self.shown[y] = [self.BLANK] * self.width
+        scrolled_rows += y - top + 1
+      y = max(y, top + 1)
+    return scrolled_rows
+
+  def __move(self, out, y, x):
+    if self.pos == (y, x):
+      return
+    # rewriting a few shown characters is shorter than moving the cursor
+    if self.pos is not None and self.pos[0] == y and 0 < x - self.pos[1] <= 4 \
+        and all(attr == self.attr for char, attr
+        in self.shown[y][self.pos[1]:x]):
+      out.extend(char for char, attr in self.shown[y][self.pos[1]:x])
+    else:
+      out.append('\x1b[{};{}H'.format(y + 1, x + 1))
+    self.pos = (y, x)
+
+  def __set_attr(self, out, attr):
+    out.append('\x1b[' + ';'.join(['0'] + [str(code) for flag, code
+        in self.SGR if attr & flag]) + 'm')
+    self.attr = attr
+
+class AnsiWindow(NullWindow):
+  """A window drawing on AnsiScreen with the interface of curses windows"""
+  def __init__(self, screen, height, width, begin_y, begin_x):
+    NullWindow.__init__(self, height, width)
+    self.screen = screen
+    self.begin_y = begin_y
+    self.begin_x = begin_x
+
+  def addstr(self, *args):
+    if len(args) >= 3:
+      self.y, self.x = args[0], args[1]
+      args = args[2:]
+    attr = args[1] if len(args) > 1 else curses.A_NORMAL
+    for char in args[0]:
+      if self.y >= self.height:
+        break
+      self.screen.rows[self.begin_y + self.y][self.begin_x + self.x] \
+          = (char, attr)
+      self.x += 1
+      if self.x == self.width:
+        self.y, self.x = self.y + 1, 0
+
+  def addch(self, char, attr=curses.A_NORMAL):
+    self.addstr(char, attr)
+
+  def clrtoeol(self):
+    row = self.screen.rows[self.begin_y + self.y]
+    row[self.begin_x + self.x:self.begin_x + self.width] \
+        = [AnsiScreen.BLANK] * (self.width - self.x)
+
+  def erase(self):
+    for y in range(self.height):
+      self.screen.rows[self.begin_y + y][self.begin_x:self.begin_x
+          + self.width] = [AnsiScreen.BLANK] * self.width
+    self.y, self.x = 0, 0
+
+  def resize(self, height, width):
+    self.height = height
+    self.width = width
+    self.y, self.x = min(self.y, height - 1), min(self.x, width - 1)
+
+  def noutrefresh(self):
+    pass
+
+  def refresh(self):
+    self.screen.cursor = (self.begin_y + min(self.y, self.height - 1),
+        self.begin_x + self.x)
+    return self.screen.flush()
+
+class RaceServer(threading.Thread):
+  """Broadcast a sample to racers and fan out a merged leaderboard
+
+  Messages are lines of text.
+  client -> server: 'n <name>', 'p <lines> <chars> <errors>', 'f' (finished)
+  server -> client: 's <size of sample>' and the sample in json,
+                    't <leaders in json>',
+                    'r <rank> <players>'
+  """
+  def __init__(self, address, item):
+    threading.Thread.__init__(self)
+    self.address = address
+    sample = json.dumps({'title': item.get_title(),
+        'content': item.get_content()}).encode()
+    # samples can be longer than the line limit of asyncio streams
+    self.sample = 's {}\n'.format(len(sample)).encode() + sample
+    # writer -> [name, lines, chars, errors, order of finish or 0]
+    self.players = {}
+    self.finish_num = 0
+    self.dirty = False
+    self.ready = threading.Event()
+    self.error = None
+
+  def run(self):
+    try:
+      asyncio.run(self.serve())
+    except OSError as e:
+      self.error = e
+    finally:
+      self.ready.set()
+
+  async def serve(self):
+    async with await self.listen():
+      await self.broadcast()
+
+  async def listen(self):
+    if isinstance(self.address, str):
+      server = await asyncio.start_unix_server(self.greet, self.address,
+          backlog=RACE_BACKLOG)
+    else:
+      server = await asyncio.start_server(self.greet, *self.address,
+          backlog=RACE_BACKLOG)
+    self.ready.set()
+    return server
+
+  async def greet(self, reader, writer):
+    try:
+      line = await reader.readline()
+      if not line.startswith(b'n '):
+        return
+      player = [line[2:].decode('utf-8', 'replace').strip(), 0, 0, 0, 0]
+      writer.write(self.sample)
+      self.players[writer] = player
+      self.dirty = True
+      async for line in reader:
+        fields = line.split()
+        if len(fields) == 4 and fields[0] == b'p':
+          player[1:4] = map(int, fields[1:])
+          self.dirty = True
+        elif fields == [b'f'] and not player[4]:
+          self.finish_num += 1
+          player[4] = self.finish_num
+          self.dirty = True
+    except (ConnectionError, ValueError):
+      pass
+    finally:
+      # keep finished racers on the leaderboard
+      if writer in self.players and not self.players[writer][4]:
+        del self.players[writer]
+        self.dirty = True
+      writer.close()
+
+  async def broadcast(self):
+    while True:
+      await asyncio.sleep(BROADCAST_INTERVAL)
+      if not self.dirty:
+        continue
+      self.dirty = False
+      ranking = sorted(self.players.items(), key=lambda player:
+          (not player[1][4], player[1][4], -player[1][1],
+          player[1][3] - player[1][2], player[1][3]))
+      leaders = ('t ' + json.dumps([player[:2] for writer, player
+          in ranking[:LEADERBOARD_SIZE]]) + '\n').encode()
+      for rank, (writer, player) in enumerate(ranking, 1):
+        # skip slow clients instead of waiting for them
+        if writer.is_closing() or writer.transport.get_write_buffer_size() \
+            > RACE_BUFFER_LIMIT:
+          continue
+        writer.write(leaders + 'r {} {}\n'.format(rank, len(ranking))
+            .encode())
+
+class RaceClient:
+  def __init__(self, address, user):
+    self.address = address
+    self.user = user
+    self.item = None
+    self.game = None
+    self.leaders = []
+    self.rank = 0
+    self.player_num = 0
+
+  async def connect(self):
+    if isinstance(self.address, str):
+      self.reader, self.writer \
+          = await asyncio.open_unix_connection(self.address)
+    else:
+      self.reader, self.writer = await asyncio.open_connection(*self.address)
+    self.writer.write('n {}\n'.format(self.user).encode())
+    line = await self.reader.readline()
+    if not line.startswith(b's ') or not line[2:].strip().isdigit():
+      raise FailException('the race server sent no sample')
+    sample = await self.reader.readexactly(int(line[2:]))
+    self.item = Item(**json.loads(sample.decode()))
+
+  async def listen(self):
+    async for line in self.reader:
+      kind, _, body = line.decode('utf-8', 'replace').partition(' ')
+      if kind == 't':
+        self.leaders = json.loads(body)
+      elif kind == 'r':
+        self.rank, self.player_num = map(int, body.split())
+
+  async def report(self):
+    """send progress of the game in batches until it is over"""
+    last = None
+    while True:
+      await asyncio.sleep(PROGRESS_INTERVAL)
+      if self.game is None:
+        continue
+      progress = self.game.get_progress()
+      if progress != last:
+        self.writer.write('p {} {} {}\n'.format(*progress).encode())
+        last = progress
+      if self.game.is_over():
+        self.writer.write(b'f\n')
+        await self.writer.drain()
+        break
+
+  def get_rank(self):
+    return '{}/{}'.format(self.rank, self.player_num)
+
+  def get_status(self):
+    if not self.leaders:
+      return ''
+    return 'rank: {}, lead: {} '.format(self.get_rank(), self.leaders[0][0])
+
+class Racer(RaceClient, threading.Thread):
+  def __init__(self, address):
+    RaceClient.__init__(self, address, getpass.getuser())
+    threading.Thread.__init__(self)
+    self.ready = threading.Event()
+
+  def run(self):
+    try:
+      asyncio.run(self.race())
+    except (OSError, EOFError, ValueError, FailException):
+      pass
+    finally:
+      self.ready.set()
+
+  async def race(self):
+    await self.connect()
+    self.ready.set()
+    listener = asyncio.ensure_future(self.listen())
+    await self.report()
+    await listener
+
+class Bot(RaceClient):
+  """A racer without terminals to generate load on race servers"""
+  async def race(self):
+    await self.connect()
+    listener = asyncio.ensure_future(self.listen())
+    self.game = Game(NullWindow())
+    self.game.add_sample(self.item.get_content())
+    self.game.start()
+    await asyncio.gather(self.type(), self.report())
+    listener.cancel()
+    self.writer.close()
+
+  async def type(self):
+    while not self.game.is_over():
+      await asyncio.sleep(60 / (BOT_SPEED * 5))
+      line = self.game.sample_t[self.game.curr_sample_line]
+      typed = self.game.input_t
+      if typed != line[:len(typed)]:
+        self.game.del_char()
+      elif random.random() < BOT_ERROR_RATE:
+        self.game.add_char('~' if line[len(typed):len(typed) + 1] != '~'
+            else '^')
+      elif typed == line:
+        self.game.add_char('\n')
+      else:
+        self.game.add_char(line[len(typed)])
+
 class Screen(enum.Enum):
   hello = 0
   menu = 1
@@ -367,6 +896,12 @@ class Items(collections.deque):
   def is_left(self):
     return bool(len(self))
 
+  def is_loading(self):
+    return False
+
+  def receive(self):
+    return False
+
 class Fortunes(Items):
   def popleft(self):
     self.append(fortune())
@@ -384,6 +919,87 @@ class Stdin(Items):
   def is_left(self):
     return bool(self.buffer)
 
+class Feeds(Items):
+  """Items from feed readers which pass them through a queue so that only
+  consumers of the items modify this"""
+  def __init__(self, urls):
+    self.queue = queue.Queue()
+    self.readers = [FeedReader(url, self.queue) for url in urls]
+    for reader in self.readers:
+      reader.start()
+
+  def receive(self):
+    """move arrived items to this and return if there are any"""
+    arrived = False
+    while True:
+      try:
+        self.append(self.queue.get_nowait())
+      except queue.Empty:
+        return arrived
+      arrived = True
+
+  def is_left(self):
+    self.receive()
+    return bool(len(self))
+
+  def is_loading(self):
+    return any(reader.is_alive() for reader in self.readers) \
+        or not self.queue.empty()
+
+  def wait(self):
+    """wait for the first item or all readers to finish"""
+    while not self.is_left() and self.is_loading():
+      try:
+        self.append(self.queue.get(timeout=0.1))
+      except queue.Empty:
+        pass
+
+  def get_errors(self):
+    return [reader.error for reader in self.readers if reader.error]
+
+class FeedReader(threading.Thread):
+  """Parse a rss or atom feed incrementally queuing its items as they arrive"""
+  ITEM_TAGS = {'item', 'entry'}
+  CONTENT_TAGS = ('description', 'summary', 'content', 'encoded')
+
+  def __init__(self, url, item_queue):
+    threading.Thread.__init__(self)
+    self.daemon = True
+    self.url = url
+    self.item_queue = item_queue
+    self.error = None
+
+  def run(self):
+    try:
+      if os.path.isfile(self.url):
+        fo = open(self.url, 'rb')
+      else:
+        fo = urllib.request.urlopen(self.url, timeout=FEED_TIMEOUT)
+      with fo:
+        parser = xml.etree.ElementTree.XMLPullParser(['end'])
+        while True:
+          data = fo.read(FEED_CHUNK_SIZE)
+          if not data:
+            break
+          parser.feed(data)
+          self.__read_events(parser)
+        parser.close()
+        self.__read_events(parser)
+    except (OSError, ValueError, http.client.HTTPException,
+        xml.etree.ElementTree.ParseError) as e:
+      self.error = '{}: {}'.format(self.url, e)
+
+  def __read_events(self, parser):
+    for event, elem in parser.read_events():
+      if local_name(elem.tag) not in self.ITEM_TAGS:
+        continue
+      children = {local_name(child.tag): child.text or ''
+          for child in elem}
+      self.item_queue.put(FeedItem(children.get('title', ''),
+          next((children[tag] for tag in self.CONTENT_TAGS
+          if children.get(tag)), '')))
+      elem.clear()
+
 class Item:
   def __init__(self, title, content):
     self.title = title
@@ -395,21 +1011,111 @@ class Item:
   def get_content(self):
     return self.content
 
+  def get_members(self):
+    """items to appear on the menu screen instead of this"""
+    return [self]
+
 class LocalFile(Item):
   def __init__(self, filename):
     self.title = filename
 
   def get_content(self):
-    with open(self.title, 'r') as fo:
-      return fo.read()
+    try:
+      with open(self.title, 'rb') as fo:
+        return read_text(fo, self.title)
+    except OSError as e:
+      raise FailException("could not read file, '{}': {}"
+          .format(self.title, e))
+
+  def get_members(self):
+    if not zipfile.is_zipfile(self.title):
+      return [self]
+    with zipfile.ZipFile(self.title) as archive:
+      return [ArchiveMember(self.title, self.title, name)
+          for name in archive.namelist() if not name.endswith('/')]
 
 class RemoteFile(Item):
   def __init__(self, url):
     self.title = url
 
   def get_content(self):
-    with urllib.request.urlopen(self.title) as res:
-      return res.read().decode('utf-8', 'replace').replace('\r', '')
+    with urllib.request.urlopen(self.title, timeout=REMOTE_TIMEOUT) as res:
+      return read_text(res, self.title).replace('\r', '')
+
+  def get_members(self):
+    # zip archives need random access
+    if not urllib.parse.urlparse(self.title).path.endswith('.zip'):
+      return [self]
+    with urllib.request.urlopen(self.title, timeout=REMOTE_TIMEOUT) as res:
+      data = io.BytesIO(res.read())
+    if not zipfile.is_zipfile(data):
+      return [self]
+    with zipfile.ZipFile(data) as archive:
+      return [ArchiveMember(self.title, data, name)
+          for name in archive.namelist() if not name.endswith('/')]
+
+class FeedItem(Item):
+  def get_content(self):
+    return '# ' + self.title + '\n' + html_to_text(self.content)
+
+class HtmlText(html.parser.HTMLParser):
+  """Convert html into text in one pass"""
+  BREAKS = {'p': '\n\n', 'div': '\n\n', 'br': '\n', 'li': '\n'}
+  IGNORED_TAGS = {'script', 'style'}
+
+  def __init__(self):
+    html.parser.HTMLParser.__init__(self, convert_charrefs=True)
+    self.pieces = []
+    self.newlines = ''
+    self.ignored = 0
+
+  def handle_starttag(self, tag, attrs):
+    if tag in self.IGNORED_TAGS:
+      self.ignored += 1
+    self.__break(tag)
+
+  def handle_endtag(self, tag):
+    if tag in self.IGNORED_TAGS:
+      self.ignored = max(self.ignored - 1, 0)
+    self.__break(tag)
+
+  def handle_startendtag(self, tag, attrs):
+    self.__break(tag)
+
+  def handle_data(self, data):
+    if self.ignored:
+      return
+    if self.newlines:
+      data = data.lstrip()
+      if not data:
+        return
+      if self.pieces:
+        self.pieces[-1] = self.pieces[-1].rstrip()
+        self.pieces.append(self.newlines)
+      self.newlines = ''
+    self.pieces.append(data)
+
+  def __break(self, tag):
+    if len(self.BREAKS.get(tag, '')) > len(self.newlines):
+      self.newlines = self.BREAKS[tag]
+
+  def get_text(self):
+    return ''.join(self.pieces)
+
+class ArchiveMember(Item):
+  def __init__(self, title, archive, name):
+    self.title = title + '::' + name
+    self.archive = archive # filename or file object of zip archive
+    self.name = name
+
+  def get_content(self):
+    try:
+      with zipfile.ZipFile(self.archive) as archive, \
+          archive.open(self.name) as fo:
+        return read_text(fo, self.title)
+    except (KeyError,) + DECOMPRESSION_ERRORS as e:
+      raise FailException("could not read file, '{}': {}"
+          .format(self.title, e))
 
 
 # functions
@@ -424,9 +1130,66 @@ def fail(err_msg):
 def invalid_url(url):
   fail("url, {} is invalid".format(url))
 
+def read_text(fo, name):
+  """read text from a binary file object decompressing it in a stream"""
+  if not hasattr(fo, 'peek'):
+    fo = io.BufferedReader(fo)
+  try:
+    magic = fo.peek(6)[:6]
+    if magic.startswith(ZIP_MAGIC_NUMBER):
+      raise FailException("file, '{}' is a zip archive in a zip archive or "
+          "without .zip extension, which is not supported".format(name))
+    for number, decompressor in MAGIC_NUMBERS:
+      if magic.startswith(number):
+        fo = decompressor(fo)
+        break
+    return io.TextIOWrapper(fo, 'utf-8', 'replace').read()
+  except DECOMPRESSION_ERRORS as e:
+    raise FailException("could not decompress file, '{}': {}"
+        .format(name, e))
+
+def local_name(tag):
+  """strip a namespace from a tag of xml"""
+  return tag.rpartition('}')[2] if isinstance(tag, str) else ''
+
+def html_to_text(text):
+  parser = HtmlText()
+  parser.feed(text)
+  parser.close()
+  return parser.get_text()
+
+def menu_pad(items, width):
+  pad = curses.newpad(len(items), width)
+  for i, item in enumerate(items):
+    pad.addstr(i, 0, '> ' + uni_to_ascii(item.get_title())
+        if len(uni_to_ascii(item.get_title())) + 2 < pad.getmaxyx()[1]
+        else '> ' + item.get_title()[:pad.getmaxyx()[1] - 6] + '...')
+  return pad
+
 def conv_tabs(text):
   return text.replace('\t', ' ' * TAB_SPACES)
 
+def race_address(value):
+  """parse <host>:<port> or a path to a unix socket"""
+  host, separator, port = value.rpartition(':')
+  if '/' in value or not separator or not port.isnumeric():
+    return value
+  return host or 'localhost', int(port)
+
+async def race_headless(address, server, bot_num):
+  if server is not None:
+    listener = await server.listen()
+    broadcaster = asyncio.ensure_future(server.broadcast())
+  start_time = time.time()
+  bots = [Bot(address, 'bot{}'.format(i)) for i in range(bot_num)]
+  await asyncio.gather(*[bot.race() for bot in bots])
+  if bot_num > 0:
+    print('{} bots finished in {:.1f}s'.format(bot_num,
+        time.time() - start_time))
+  if server is not None:
+    async with listener:
+      await broadcaster
+
 def fortune():
   text = subprocess.check_output('fortune').decode('ascii')
   return Item(conv_tabs(text.split('\n', 1)[0]), text)
@@ -441,16 +1204,17 @@ def uni_to_ascii(text):
 
 
 # main routine
-if not sys.stdout.isatty():
-  fail('stdout is not a tty')
 
 ## parse command line arguments
 try:
-  opts, args = getopt.getopt(sys.argv[1:], 'a:cdefl:mnqrst:w')
+  opts, args = getopt.getopt(sys.argv[1:], 'a:b:cdefj:l:mnqrR:sS:t:uw')
 except getopt.GetoptError as err:
   fail(str(err))
 
 rss_mode = False
+race_addr = None
+race_host = False
+bot_num = None
 for option, value in opts:
   if option == '-a':
     if value == "reverse":
@@ -467,6 +1231,11 @@ for option, value in opts:
       fail("the argument, '{}' of -a option is invalid\n"
           "valid arguments are 'reverse' (default), 'undreline', "
           "'blink', 'bold', and 'normal'".format(value))
+  elif option == '-b':
+    if value.isnumeric():
+      bot_num = int(value)
+    else:
+      fail('the argument of option, -b must be an integer')
   elif option == '-c':
     SPEED_UNIT = UNIT_CPS
   elif option == '-d':
@@ -475,6 +1244,9 @@ for option, value in opts:
     Game.KEEP_EMPTY_LINES = False
   elif option == '-f':
     rss_mode = True
+  elif option == '-j':
+    race_addr = race_address(value)
+    race_host = False
   elif option == '-l':
     if len(value) != 1:
       fail('the argument of -l option must be one character')
@@ -488,8 +1260,21 @@ for option, value in opts:
     STATUS_BAR = False
   elif option == '-r':
     RECURSIVE_SEARCH = True
+  elif option == '-R':
+    if value == "curses":
+      RENDERER = RENDERER_CURSES
+    elif value == "ansi":
+      RENDERER = RENDERER_ANSI
+    else:
+      fail("the argument, '{}' of -R option is invalid\n"
+          "valid arguments are 'curses' (default) and 'ansi'".format(value))
   elif option == '-s':
     STATUS_BAR = False
+  elif option == '-S':
+    race_addr = race_address(value)
+    race_host = True
+  elif option == '-u':
+    AnsiScreen.SYNC_UPDATE = True
   elif option == '-t':
     if value.isnumeric():
       TAB_SPACES = int(value)
@@ -498,31 +1283,35 @@ for option, value in opts:
   elif option == '-w':
     Game.ERASE_MULTIPLE_SPACE = True
 
-if not os.isatty(0) and len(args) == 0:
+if bot_num is not None and race_addr is None:
+  fail('-b option is valid only with -S or -j option')
+if not sys.stdout.isatty() and bot_num is None:
+  fail('stdout is not a tty')
+
+if race_addr is not None and not race_host:
+  if len(args) > 0 or rss_mode:
+    fail('no argument is needed to join a race')
+  items = Items([])
+elif not os.isatty(0) and len(args) == 0 and bot_num is None:
   ENDLESS = True
   Game.SEPARATE_SAMPLES = False
   os.dup2(0, 3)
   os.close(0)
   sys.stdin = open('/dev/tty', 'r')
   items = Stdin(os.fdopen(3, 'r'))
-elif not os.isatty(0):
+elif not os.isatty(0) and bot_num is None:
   fail('no argument is needed in stdin mode')
-elif rss_mode and len(args) == 1:
-  import feedparser
-  print('downloading the rss feed from the url...')
-  feed = feedparser.parse(args[0])
-  if feed["bozo"] != 0:
-    fail('could not fetch rss feeds. check the url.')
-  if len(feed['items']) == 0:
-    fail('no item found in the rss feed')
-  items = Items([])
-  for item in feed["items"]:
-    items.append(Item(item['title'], '# ' + item['title'] + '\n'
-        + re.sub(r'<[^<>]+>', '',
-        re.sub(r'\s*</\s*p\s*>\s*<\s*p([^>]|(".*")|(\'.*\'))*>\s*', '\n\n',
-        item['summary']))))
+elif rss_mode and len(args) > 0:
+  print('downloading the rss feeds from the urls...')
+  items = Feeds(args)
+  items.wait()
+  if not items.is_left():
+    if len(items.get_errors()) == len(args):
+      fail('could not fetch rss feeds. check the urls.\n'
+          + '\n'.join(items.get_errors()))
+    fail('no item found in the rss feeds')
 elif rss_mode:
-  fail('assign one url as an argument to play in rss mode')
+  fail('assign urls as arguments to play in rss mode')
 elif len(args) > 0:
   items = Items([])
   for resource in args:
@@ -536,7 +1325,7 @@ elif len(args) > 0:
       url = urllib.parse.urlparse(resource)
       signal.signal(signal.SIGALRM, lambda signum, frame: \
           fail('host, {} of url, {} timed out'.format(url.netloc, resource)))
-      signal.setitimer(signal.ITIMER_REAL, 5)
+      signal.setitimer(signal.ITIMER_REAL, REMOTE_TIMEOUT)
       if url.scheme == 'http' or url.scheme == 'https':
         if url.scheme == 'http':
           conn = http.client.HTTPConnection(url.netloc)
@@ -568,13 +1357,57 @@ elif len(args) > 0:
         fail("invalid scheme, {} of uri, {}".format(url.scheme, resource))
       else:
         fail("file, '{}' doesn't exist".format(resource))
+      # zip archives are downloaded here under the same guard
+      signal.setitimer(signal.ITIMER_REAL, ARCHIVE_TIMEOUT)
+      try:
+        items.extend(items.pop().get_members())
+      except (OSError, zipfile.BadZipFile) as e:
+        fail('could not download {}: {}'.format(resource, e))
       signal.setitimer(signal.ITIMER_REAL, 0)
+  # remote zip archives are already expanded above
+  try:
+    items = Items([member for item in items for member in
+        (item.get_members() if isinstance(item, LocalFile) else [item])])
+  except (OSError, zipfile.BadZipFile) as e:
+    fail(str(e))
 else:
   MENU_SCREEN = not MENU_SCREEN
   items = Fortunes([])
   for i in range(24):
     items.append(fortune())
 
+## race mode
+racer = None
+if race_addr is not None:
+  server = None
+  if race_host:
+    if not items.is_left():
+      fail('no sample to race with')
+    server = RaceServer(race_addr, items.popleft())
+  if bot_num is not None:
+    try:
+      asyncio.run(race_headless(race_addr, server, bot_num))
+    except (OSError, EOFError, ValueError, FailException) as e:
+      fail(str(e))
+    except KeyboardInterrupt:
+      pass
+    exit(0)
+  if server is not None:
+    server.daemon = True
+    server.start()
+    server.ready.wait(RACE_TIMEOUT)
+    if server.error is not None:
+      fail('could not serve a race at {}: {}'.format(race_addr, server.error))
+  racer = Racer(race_addr)
+  racer.daemon = True
+  racer.start()
+  racer.ready.wait(RACE_TIMEOUT)
+  if racer.item is None:
+    fail('could not join the race at {}'.format(race_addr))
+  items = Items([racer.item])
+  ENDLESS = False
+  MENU_SCREEN = False
+
 err_msg = ''
 try:
   # CAUTION
@@ -614,17 +1447,25 @@ try:
           notebook = window.derwin(window.getmaxyx()[0],
               window.getmaxyx()[1], 0, 0)
         notebook.keypad(True)
+        # notebook is kept for input with the ansi renderer
+        if RENDERER == RENDERER_ANSI:
+          canvas = AnsiScreen(sys.stdout.fileno(), *window.getmaxyx())
+          page = canvas.derwin(*notebook.getmaxyx(), 0, 0)
+          if STATUS_BAR:
+            footer = canvas.derwin(*bar.getmaxyx(), bar.getbegyx()[0], 0)
+        else:
+          page = notebook
+          if STATUS_BAR:
+            footer = bar
         screen = Screen.go_to_next_game()
 
     elif screen == Screen.menu: # for resources mode
       window.clear()
       window.refresh()
-      pad = curses.newpad(len(items), window.getmaxyx()[1])
+      pad = menu_pad(list(items), window.getmaxyx()[1])
       pad.keypad(True)
-      for i, item in enumerate(items):
-        pad.addstr(i, 0, '> ' + uni_to_ascii(item.get_title())
-            if len(uni_to_ascii(item.get_title())) + 2 < pad.getmaxyx()[1]
-            else '> ' + item.get_title()[:pad.getmaxyx()[1] - 6] + '...')
+      if items.is_loading():
+        pad.timeout(MENU_POLLING_INTERVAL)
       pad.move(0, 0)
       pad.refresh(0, 0, 0, 0, window.getmaxyx()[0] - 1,
           window.getmaxyx()[1] - 1)
@@ -642,6 +1483,14 @@ try:
           pos = min(pos + 1, pad.getmaxyx()[0] - 1)
         elif char == ord('k') or char == curses.KEY_UP:
           pos = max(pos - 1, 0)
+        # items arriving while loading
+        if items.receive():
+          pad.keypad(False)
+          pad = menu_pad(list(items), window.getmaxyx()[1])
+          pad.keypad(True)
+          pad.timeout(MENU_POLLING_INTERVAL)
+        if not items.is_loading():
+          pad.timeout(-1)
         pad.move(pos, 0)
         # scrolling the pad
         if pad.getmaxyx()[0] - 1 - pos <= (window.getmaxyx()[0] - 1) // 2:
@@ -656,27 +1505,40 @@ try:
       pad.keypad(False)
 
     elif screen == Screen.game:
-      game = Game(notebook)
+      if RENDERER == RENDERER_ANSI:
+        # let curses have nothing to draw on notebook.getch()
+        notebook.erase()
+        notebook.refresh()
+        canvas.clear()
+      game = Game(page)
       game.add_sample(items.popleft().get_content())
+      if racer is not None:
+        racer.game = game
       if ENDLESS:
         boss = Boss(game)
         boss.daemon = True
         boss.assign_tasks()
         boss.start()
 
+      too_small = False
       if STATUS_BAR:
         def timer_handler(signum, frame):
-          bar.addstr(0, 0, 'speed: {}, accur: {}, typos: {} '.format(
-              game.get_speed(), game.get_accuracy(), game.get_errors()),
+          if too_small:
+            return
+          status = 'speed: {}, accur: {}, typos: {} '.format(
+              game.get_speed(), game.get_accuracy(), game.get_errors())
+          if racer is not None:
+            status += racer.get_status()
+          footer.addstr(0, 0, status[:footer.getmaxyx()[1] - 1],
               curses.A_REVERSE)
-          bar.refresh()
-          notebook.refresh()
+          footer.noutrefresh()
+          page.refresh()
         signal.signal(signal.SIGALRM, timer_handler)
         signal.setitimer(signal.ITIMER_REAL, 0.01, 1)
-        bar.refresh()
+        footer.noutrefresh()
 
       game.start()
-      notebook.refresh()
+      page.refresh()
       while not game.is_over():
         char = notebook.getch()
         if char == curses.ascii.ESC or char == 5: # 5 is ctrl + 'e'
@@ -686,6 +1548,39 @@ try:
           else:
             screen = Screen.leave
           break
+        elif char == curses.KEY_RESIZE:
+          # the timer draws on the windows replaced here
+          signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGALRM])
+          try:
+            height, width = window.getmaxyx()
+            too_small = height < MIN_HEIGHT or width < MIN_WIDTH
+            if too_small:
+              # stop the game until the terminal gets large enough again
+              window.clear()
+              window.addstr(0, 0, 'too small'[:width - 1])
+              window.refresh()
+              continue
+            if STATUS_BAR:
+              notebook.resize(height - 1, width)
+              bar = window.derwin(1, width, height - 1, 0)
+            else:
+              notebook.resize(height, width)
+            if RENDERER == RENDERER_ANSI:
+              notebook.erase()
+              notebook.refresh()
+              canvas.resize(height, width)
+              page.resize(*notebook.getmaxyx())
+              if STATUS_BAR:
+                footer = canvas.derwin(1, width, height - 1, 0)
+            else:
+              window.erase()
+              if STATUS_BAR:
+                footer = bar
+            game.resize()
+          finally:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, [signal.SIGALRM])
+        elif too_small:
+          continue
         elif char == 21: # 21 is ctrl + 'u'
           game.clear_input_line()
         elif char == curses.ascii.DEL or char == curses.ascii.BS \
@@ -695,7 +1590,7 @@ try:
             or char == curses.ascii.NL \
             or char == curses.ascii.TAB: # space to tilda in ascii
           game.add_char(chr(char))
-        notebook.refresh()
+        page.refresh()
       else:
         if RESULT_SCREEN:
           screen = Screen.result
@@ -716,7 +1611,10 @@ try:
           .format('accuracy:', game.get_accuracy()))
       window.addstr(3, 0, "{:9s} {:>5s}"
           .format('typos:', game.get_errors()))
-      window.addstr(4, 0, "press any key...")
+      if racer is not None:
+        window.addstr(4, 0, "{:9s} {:>5s}"
+            .format('rank:', racer.get_rank()))
+      window.addstr(window.getyx()[0] + 1, 0, "press any key...")
       window.getch()
       screen = Screen.leave
 
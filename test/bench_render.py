@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+# compare renderers of typetod typing a sample on a pseudo terminal
+#
+# usage: bench_render.py [<sample file>]
+
+import os
+import pty
+import select
+import struct
+import sys
+import termios
+import fcntl
+import time
+
+
+TYPETOD = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '..', 'src', 'typetod.py')
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tab')
+RENDERERS = ['curses', 'ansi']
+HEIGHT = 24
+WIDTH = 80
+QUIET_TIME = 0.02 # [s] without output regarded as the end of a frame
+
+
+def read_frame(fd):
+  data = b''
+  last_time = time.time()
+  while select.select([fd], [], [], QUIET_TIME)[0]:
+    try:
+      chunk = os.read(fd, 65536)
+    except OSError:
+      break
+    if not chunk:
+      break
+    data += chunk
+    last_time = time.time()
+  return data, last_time
+
+def keystrokes(filename):
+  with open(filename, 'r') as fo:
+    for line in fo.read().replace('\t', '  ').split('\n'):
+      line = ' '.join(line.split())
+      if line:
+        yield from line
+        yield '\n'
+
+def bench(renderer, filename):
+  pid, fd = pty.fork()
+  if pid == 0:
+    os.environ['TERM'] = os.environ.get('TERM', 'xterm')
+    os.execvp(sys.executable, [sys.executable, TYPETOD, '-e', '-m', '-q', '-w',
+        '-R', renderer, filename])
+  fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack('HHHH', HEIGHT, WIDTH, 0,
+      0))
+  time.sleep(0.5)
+  read_frame(fd)
+  os.write(fd, b' ') # hello screen
+  read_frame(fd)
+  sizes = []
+  times = []
+  for char in keystrokes(filename):
+    start_time = time.time()
+    os.write(fd, char.encode())
+    data, end_time = read_frame(fd)
+    sizes.append(len(data))
+    times.append(end_time - start_time)
+  os.write(fd, b'\x05\x05n')
+  read_frame(fd)
+  os.close(fd)
+  os.waitpid(pid, 0)
+  return sizes, times
+
+def main():
+  filename = sys.argv[1] if len(sys.argv) > 1 else SAMPLE
+  print('{:8s} {:>10s} {:>10s} {:>12s}'.format('renderer', 'keystrokes',
+      'bytes/key', 'ms/frame'))
+  for renderer in RENDERERS:
+    sizes, times = bench(renderer, filename)
+    print('{:8s} {:>10d} {:>10.1f} {:>12.2f}'.format(renderer, len(sizes),
+        sum(sizes) / len(sizes), sum(times) / len(times) * 1000))
+
+if __name__ == '__main__':
+  main()